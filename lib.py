@@ -17,7 +17,12 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 '''
 import interactions
-from typing import Optional, cast, Union
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import operator
+from typing import AsyncIterator, Optional, Union
 
 "Highly recommended - we suggest providing proper debug logging"
 from src import logutil
@@ -30,6 +35,73 @@ webhook_name: str = "DBF"
 webhook_avatar: interactions.Absent[interactions.UPLOADABLE_TYPE] = interactions.MISSING
 
 __MESSAGE_LEN_LIMIT: int = 2000
+"Migrated messages never mention anyone. Shared by all sends, the library only serialises it."
+_NO_MENTIONS: interactions.AllowedMentions = interactions.AllowedMentions.none()
+"Maximum number of forum posts fetched at the same time"
+fetch_concurrency: int = 10
+"Maximum number of threads migrated at the same time, kept low as they share the channel webhook rate limit. 1 keeps the forum post order."
+migrate_concurrency: int = 3
+"Maximum number of fetched messages waiting to be migrated in a GuildText channel"
+history_queue_size: int = 64
+
+"HTTPException codes stopping the history iteration: archived thread, unknown channel, no access, lack permission"
+_HISTORY_BREAK_CODES: frozenset[int] = frozenset({50083, 10003, 50001, 50013})
+
+"HTTPException code: (reason text, whether to give up the message) when sending a migrated message"
+_MIGRATE_ERRORS: dict[int, tuple[str, bool]] = {
+    50083: ("This thread is archived", False),                                  # Operation in archived thread
+    10003: ("The channel is unknown", True),                                    # Unknown channel
+    10008: ("The message is unknown", True),                                    # Unknown message
+    50001: ("The bot has no access", True),                                     # No Access
+    50006: ("Cannot send an empty message", False),                             # Cannot send an empty message
+    50013: ("The bot lacks the write permission to this channel", True),        # Lack permission
+    50021: ("This thread is archived", False),                                  # Cannot execute on system message
+    160005: ("This thread is locked", False),                                   # Thread is locked
+}
+
+"Types of the replied message which are quoted in the migrated message"
+_QUOTABLE_TYPES: frozenset[interactions.MessageType] = frozenset({
+    interactions.MessageType.DEFAULT,
+    interactions.MessageType.REPLY,
+    interactions.MessageType.THREAD_STARTER_MESSAGE
+})
+
+"Fields of the original message read by `migrate_message`"
+_message_fields = operator.attrgetter(
+    'content', 'embeds', 'attachments', 'author', 'author.display_name', 'channel.name'
+)
+
+"Webhook used by each destination channel, keyed by the channel ID"
+_webhook_cache: dict[int, interactions.Webhook] = {}
+_webhook_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+async def iter_history(history: interactions.ChannelHistory) -> AsyncIterator[interactions.Message]:
+    """
+    Iterate the ChannelHistory iteractor while handling all kinds of errors
+
+    Parameters:
+        history         ChannelHistory  Iteractor
+
+    Yield:
+        message         Message         Messages in the history order
+    """
+    while True:
+        try:
+            async for msg in history:
+                yield msg
+            return
+        except interactions.errors.HTTPException as e:
+            code = e.code
+            if not isinstance(code, int):
+                try:
+                    code = int(code)
+                except (TypeError, ValueError):
+                    continue
+            if code in _HISTORY_BREAK_CODES:
+                return
+            """Other codes (unknown message, system message, locked thread, ...) carry on with the next fetch"""
+        except Exception:
+            pass
 
 async def flatten_history_iterator(history: interactions.ChannelHistory, reverse: bool = False) -> list[interactions.Message]:
     """
@@ -42,69 +114,149 @@ async def flatten_history_iterator(history: interactions.ChannelHistory, reverse
     Return:
         message_list    list[Message]   List of messages in the list
     """
-    ret_list: list[interactions.Message] = []
-    while True:
-        try:
-            msg = await history.__anext__()
-            ret_list.append(msg)
-        except StopAsyncIteration:
-            break
-        except interactions.errors.HTTPException as e:
-            try:
-                match int(e.code):
-                    case 50083:
-                        """Operation in archived thread"""
-                        break
-                    case 10003:
-                        """Unknown channel"""
-                        break
-                    case 10008:
-                        """Unknown message"""
-                        pass
-                    case 50001:
-                        """No Access"""
-                        break
-                    case 50013:
-                        """Lack permission"""
-                        break
-                    case 50021:
-                        """Cannot execute on system message"""
-                        pass
-                    case 160005:
-                        """Thread is locked"""
-                        pass
-                    case _:
-                        """Default"""
-                        pass
-            except ValueError:
-                pass
-        except Exception:
-            pass
+    ret_list: list[interactions.Message] = [msg async for msg in iter_history(history)]
     if reverse:
         ret_list.reverse()
     return ret_list
 
 
-async def fetch_create_webhook(dest_chan: interactions.WebhookMixin) -> interactions.Webhook:
+def iter_history_from_oldest(channel: interactions.MessageableMixin) -> AsyncIterator[interactions.Message]:
+    """
+    Iterate all messages of a channel from the oldest while handling all kinds of errors
+
+    Parameters:
+        channel         MessageableMixin    The channel to read
+
+    Return:
+        messages        AsyncIterator       Messages from the oldest to the newest
+    """
+    # A history with `after` set runs from the oldest message, so no need to flatten and reverse it
+    return iter_history(channel.history(0, after=1))
+
+async def _chain_first(first: Optional[interactions.Message], rest: AsyncIterator[interactions.Message]) -> AsyncIterator[interactions.Message]:
+    """Put back a message taken from the front of an iterator"""
+    if first is None:
+        return
+    yield first
+    async for msg in rest:
+        yield msg
+
+@asynccontextmanager
+async def _task_group() -> AsyncIterator[asyncio.TaskGroup]:
+    """
+    asyncio.TaskGroup which raises a single failure as is instead of wrapped in an ExceptionGroup,
+    so that callers can still catch `HTTPException`. Several failures are raised as the group.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            yield tg
+    except BaseExceptionGroup as eg:
+        error: BaseException = eg
+        while isinstance(error, BaseExceptionGroup) and len(error.exceptions) == 1:
+            error = error.exceptions[0]
+        if error is eg:
+            raise
+        raise error from None
+
+async def _fill_queue(messages: AsyncIterator[interactions.Message], queue: asyncio.Queue) -> None:
+    """Put the messages into the queue, followed by None once exhausted"""
+    async for msg in messages:
+        await queue.put(msg)
+    await queue.put(None)
+
+async def fetch_create_webhook(dest_chan: interactions.WebhookMixin, refresh: bool = False) -> interactions.Webhook:
     """
     Fetch the webhook from a destination channel. If not exist, create one.
+    The webhook is cached per destination channel.
 
     Parameters:
         dest_chan   WebhookMixin    Destination channel
+        refresh     bool            (Default False) Whether to ignore the cached webhook and fetch again
 
     Return:
         webhook     Webhook         Fetched webhook
     """
-    dest_chan: interactions.WebhookMixin = cast(interactions.WebhookMixin, dest_chan)
-    webhooks: list[interactions.Webhook] = await dest_chan.fetch_webhooks()
-    available_webhooks: list[interactions.Webhook] = [wh for wh in webhooks if wh.name == webhook_name]
-    if len(available_webhooks) == 0:
-        webhook: interactions.Webhook = await dest_chan.create_webhook(name=webhook_name, avatar=webhook_avatar)
-    else:
-        webhook: interactions.Webhook = available_webhooks[0]
+    if not refresh and (webhook := _webhook_cache.get(dest_chan.id)) is not None:
+        return webhook
+    # Concurrent migrations to the same channel must not create the webhook twice
+    async with _webhook_locks[dest_chan.id]:
+        if not refresh and (webhook := _webhook_cache.get(dest_chan.id)) is not None:
+            return webhook
+        webhooks: list[interactions.Webhook] = await dest_chan.fetch_webhooks()
+        available_webhooks: list[interactions.Webhook] = [wh for wh in webhooks if wh.name == webhook_name]
+        if len(available_webhooks) == 0:
+            webhook: interactions.Webhook = await dest_chan.create_webhook(name=webhook_name, avatar=webhook_avatar)
+        else:
+            webhook: interactions.Webhook = available_webhooks[0]
+        _webhook_cache[dest_chan.id] = webhook
     
     return webhook
 
+async def send_webhook_message(dest_chan: interactions.WebhookMixin, **kwargs) -> Optional[interactions.Message]:
+    """
+    Send a message through the destination channel webhook.
+    If the cached webhook has been deleted, fetch or create it again and retry once.
+
+    Parameters:
+        dest_chan   WebhookMixin        Destination channel
+        kwargs                          Arguments passed to `Webhook.send`
+
+    Return:
+        sent_msg    Optional[Message]   The sent message
+    """
+    webhook: interactions.Webhook = await fetch_create_webhook(dest_chan=dest_chan)
+    try:
+        return await webhook.send(**kwargs)
+    except interactions.errors.HTTPException as e:
+        if e.code != 10015:
+            raise
+        """Unknown webhook"""
+        webhook = await fetch_create_webhook(dest_chan=dest_chan, refresh=True)
+        return await webhook.send(**kwargs)
+
+async def fetch_guild_stickers(guild: interactions.Guild, cache: Optional[dict[int, list[interactions.Sticker]]] = None) -> list[interactions.Sticker]:
+    """
+    Fetch all custom stickers of a guild.
+
+    Parameters:
+        guild       Guild               Destination guild
+        cache       Optional[dict]      (Default: None) Stickers already fetched in this migration, keyed by the guild ID. None to always fetch.
+
+    Return:
+        stickers    list[Sticker]   Custom stickers of the guild
+    """
+    if cache is None:
+        return await guild.fetch_all_custom_stickers()
+    stickers: Optional[list[interactions.Sticker]] = cache.get(guild.id)
+    if stickers is None:
+        stickers = await guild.fetch_all_custom_stickers()
+        cache[guild.id] = stickers
+    return stickers
+
+def _poll_media_to_str(poll_media: Union[interactions.PollMedia, dict]) -> str:
+    """
+    Convert a PollMedia object (or its dict form) to text, prefixed with its emoji.
+    """
+    if isinstance(poll_media, interactions.PollMedia):
+        emoji = poll_media.emoji
+        text: Optional[str] = poll_media.text
+        if emoji:
+            emoji_id, emoji_name = emoji.id, emoji.name
+    else:
+        emoji = poll_media.get('emoji')
+        text: Optional[str] = poll_media.get('text')
+        if emoji:
+            emoji_id, emoji_name = emoji.get('id'), emoji.get('name')
+    ret: str = ""
+    if emoji:
+        ret = f"<:{emoji_name}:{emoji_id}>" if emoji_id else emoji_name
+    if text is not None:
+        ret += " " + text
+    return ret
+
+def _poll_answer_to_str(count: int, answer: str) -> str:
+    return f"{count:04d} - {answer}"
+
 def convert_poll_to_message(poll: interactions.Poll) -> str:
     """
     Convert current poll Q&A with results to postable message text.
@@ -115,31 +267,47 @@ def convert_poll_to_message(poll: interactions.Poll) -> str:
     Return:
         message str     Converted message string
     """
-    def poll_media_to_str(poll_media: interactions.PollMedia) -> str:
-        ret: str = ""
-        if isinstance(poll_media, interactions.PollMedia):
-            poll_media = poll_media.to_dict()
-        if 'emoji' in poll_media.keys() and poll_media['emoji']:
-            if 'id' in poll_media['emoji']:
-                ret += f"<:{poll_media['emoji']['name']}:{poll_media['emoji']['id']}>"
-            else:
-                ret += poll_media["emoji"]['name']
-        if 'text' in poll_media.keys():
-            ret += " " + poll_media['text']
-        return ret
-    
-    question_str: str = poll_media_to_str(poll.question)
-    answers: list[str] = [poll_media_to_str(pa.poll_media) for pa in poll.answers]
+    question_str: str = _poll_media_to_str(poll.question)
+    answers: list[str] = [_poll_media_to_str(pa.poll_media) for pa in poll.answers]
     if poll.results:
         results: list[int] = [ac.count for ac in poll.results.answer_counts]
-        answers = (f"{i:04d} - {j}" for i, j in zip(results, answers))
-    final_str: str = question_str + "\n" + "\n".join(answers)
+        answers_str: str = "\n".join(map(_poll_answer_to_str, results, answers))
+    else:
+        answers_str: str = "\n".join(answers)
+    final_str: str = question_str + "\n" + answers_str
     if poll.results:
-        final_str = f"(Poll finished) {final_str}"
+        final_str = "(Poll finished) " + final_str
 
     return final_str
 
-async def migrate_message(orig_msg: interactions.Message, dest_chan: interactions.GuildChannel, thread_id: Optional[int] = None) -> tuple[bool, Optional[int], Optional[interactions.Message]]:
+def split_message_text(text: str, limit: int) -> list[str]:
+    """
+    Split a message text into chunks within the length limit, preferably at line breaks.
+
+    Parameters:
+        text    str         Message text
+        limit   int         Maximum length of each chunk
+
+    Return:
+        chunks  list[str]   Text chunks in order
+    """
+    chunks: list[str] = []
+    pos: int = 0
+    n: int = len(text)
+    while pos < n:
+        end: int = pos + limit
+        if end < n:
+            # Cut after the last line break in the window, unless only blank lines precede it. Hard cut otherwise.
+            bk: int = text.rfind("\n", pos, end)
+            if bk > pos and not text[pos:bk].isspace():
+                end = bk + 1
+        # Discord rejects whitespace only content
+        if not text[pos:end].isspace():
+            chunks.append(text[pos:end])
+        pos = end
+    return chunks
+
+async def migrate_message(orig_msg: interactions.Message, dest_chan: interactions.GuildChannel, thread_id: Optional[int] = None, sticker_cache: Optional[dict[int, list[interactions.Sticker]]] = None) -> tuple[bool, Optional[int], Optional[interactions.Message]]:
     """
     Migrate a message to target channel. Only supports GuildText and GuildForum
 
@@ -147,6 +315,7 @@ async def migrate_message(orig_msg: interactions.Message, dest_chan: interaction
         orig_msg    Message             The original message object
         dest_chan   GuildChannel        Destination channel
         thread_id   Optional[int]       (Default: None) Destination thread ID in the channel. 0 to create a new one. None if not thread.
+        sticker_cache   Optional[dict]  (Default: None) Destination guild stickers shared by the current migration. None to fetch them again.
 
     Return:
         Success     bool                Whether this operation is successful
@@ -154,13 +323,14 @@ async def migrate_message(orig_msg: interactions.Message, dest_chan: interaction
         dest_msg    Optional[Message]   The sent message
     """
     # Initialise variables to be used
-    msg_text: str = orig_msg.content
-    msg_embeds: list[interactions.Embed] = orig_msg.embeds
-    msg_attachments: list[interactions.Asset] = orig_msg.attachments
-    msg_author: interactions.User = orig_msg.author
-    author_avatar: interactions.Asset = msg_author.display_avatar
-    author_name: str = msg_author.display_name
-    channel_name: str = orig_msg.channel.name
+    msg_text: str
+    msg_embeds: list[interactions.Embed]
+    msg_attachments: list[interactions.Asset]
+    msg_author: interactions.User
+    author_name: str
+    channel_name: str
+    msg_text, msg_embeds, msg_attachments, msg_author, author_name, channel_name = _message_fields(orig_msg)
+    avatar_url: str = msg_author.display_avatar.url
 
     thread: interactions.Snowflake_Type = None
     thread_name: Optional[str] = None
@@ -168,36 +338,40 @@ async def migrate_message(orig_msg: interactions.Message, dest_chan: interaction
     available_stickers: Optional[list[interactions.Sticker]] = None
 
     # Check destination channel type
-    if not (isinstance(dest_chan, interactions.GuildText) or isinstance(dest_chan, interactions.GuildForum)):
-        return False, None
-    # Get destination channel webhook. If not present, create one.
-    webhook: interactions.Webhook = await fetch_create_webhook(dest_chan=dest_chan)
-
+    if not isinstance(dest_chan, (interactions.GuildText, interactions.GuildForum)):
+        return False, None, None
     # Get the message the current message is replying to
     reply_to: Optional[interactions.Message] = orig_msg.get_referenced_message()
-    replied_text: str = ""
-    if reply_to is not None and any(reply_to.type == _ for _ in [interactions.MessageType.DEFAULT, interactions.MessageType.REPLY, interactions.MessageType.THREAD_STARTER_MESSAGE]):
-        if reply_to.poll:
-            msgs_reply_to: list[str] = ["> " + msg_reply_to for msg_reply_to in convert_poll_to_message(reply_to.poll).splitlines(False)]
-        else:
-            msgs_reply_to: list[str] = ["> " + msg_reply_to for msg_reply_to in reply_to.content.splitlines(False)]
-        replied_text: str = f"> **{reply_to.author.display_name}** said:\n" + '\n'.join(msgs_reply_to)
-    msg_text = replied_text + "\n" + msg_text
+    # Nothing to send for an empty message
+    if reply_to is None and not msg_attachments and is_empty_message(orig_msg):
+        return True, thread_id, None
+    # Collect the message parts from top to bottom
+    parts: list[str] = []
+    if orig_msg.poll:
+        parts.append(convert_poll_to_message(orig_msg.poll))
 
-    if msg_attachments:
-        attachment_url: str = "\n".join(i.url for i in msg_attachments)
-        msg_text = attachment_url + "\n" + msg_text
-    
     if orig_msg.sticker_items:
-        all_stickers = await dest_chan.guild.fetch_all_custom_stickers()
-        available_stickers = [sticker for sticker in all_stickers if any(sticker.id == i.id or sticker.name == i.name for i in orig_msg.sticker_items)]
-        if orig_msg.sticker_items and len(available_stickers) < len(orig_msg.sticker_items):
-            msg_text = f"Sticker {','.join(i.name for i in orig_msg.sticker_items if not any(i.id == s.id or i.name == s.name for s in available_stickers))} not available\n" + msg_text
-        for s in available_stickers:
-            msg_text = f"{s.url}\n" + msg_text
+        all_stickers = await fetch_guild_stickers(dest_chan.guild, sticker_cache)
+        want_ids: set[int] = {i.id for i in orig_msg.sticker_items}
+        want_names: set[str] = {i.name for i in orig_msg.sticker_items}
+        available_stickers = [sticker for sticker in all_stickers if sticker.id in want_ids or sticker.name in want_names]
+        parts.extend(s.url for s in available_stickers)
+        if len(available_stickers) < len(orig_msg.sticker_items):
+            found_ids: set[int] = {s.id for s in available_stickers}
+            found_names: set[str] = {s.name for s in available_stickers}
+            parts.append(f"Sticker {','.join(i.name for i in orig_msg.sticker_items if not (i.id in found_ids or i.name in found_names))} not available")
 
-    if orig_msg.poll:
-        msg_text = convert_poll_to_message(orig_msg.poll) + "\n" + msg_text
+    if msg_attachments:
+        parts.extend(i.url for i in msg_attachments)
+
+    if reply_to is not None and reply_to.type in _QUOTABLE_TYPES and (reply_to.content or reply_to.poll):
+        quoted: str = convert_poll_to_message(reply_to.poll) if reply_to.poll else reply_to.content
+        parts.append(f"> **{reply_to.author.display_name}** said:\n> " + "\n> ".join(quoted.splitlines(False)))
+    parts.append(msg_text)
+    msg_text = "\n".join([part for part in parts if part])
+    # Nothing left to send, e.g. a message with reactions only
+    if not msg_text and not msg_embeds:
+        return True, thread_id, None
 
     if thread_id is None:
         pass
@@ -208,108 +382,135 @@ async def migrate_message(orig_msg: interactions.Message, dest_chan: interaction
     
     # Split send the message if the length exceeds limit
     sent_msg: Optional[int] = None
-    for text in (msg_text[0 + i : __MESSAGE_LEN_LIMIT + i] for i in range(0, len(msg_text), __MESSAGE_LEN_LIMIT)):
+    # An embed-only message still needs one (empty) send
+    chunks: list[str] = split_message_text(msg_text, __MESSAGE_LEN_LIMIT) or [""]
+    send_kwargs: dict = dict(
+        embeds=msg_embeds,
+        username=author_name,
+        avatar_url=avatar_url,
+        allowed_mentions=_NO_MENTIONS,
+        wait=True,
+        thread=thread,
+        thread_name=thread_name
+    )
+    for text in chunks:
         try:
-            sent_msg = await webhook.send(
-                content=text,
-                embeds=msg_embeds,
-                username=author_name,
-                avatar_url=author_avatar.url,
-                reply_to=sent_msg,
-                allowed_mentions=interactions.AllowedMentions.none(),
-                wait=True,
-                thread=thread,
-                thread_name=thread_name
-            )
+            sent_msg = await send_webhook_message(dest_chan, content=text, reply_to=sent_msg, **send_kwargs)
         except interactions.errors.HTTPException as e:
-            if e.code is None:
+            if not isinstance(e.code, int):
+                """The library sets MISSING when Discord gives no error code"""
                 reason_text: str = "of unknown error code"
             else:
-                match int(e.code):
-                    case 50083:
-                        """Operation in archived thread"""
-                        reason_text: str = "This thread is archived"
-                    case 10003:
-                        """Unknown channel"""
-                        reason_text: str = "The channel is unknown"
-                        return
-                    case 10008:
-                        """Unknown message"""
-                        reason_text: str = "The message is unknown"
-                        return
-                    case 50001:
-                        """No Access"""
-                        reason_text: str = "The bot has no access"
-                        return
-                    case 50006:
-                        """Cannot send an empty message"""
-                        reason_text: str = "Cannot send an empty message"
-                    case 50013:
-                        """Lack permission"""
-                        reason_text: str = "The bot lacks the write permission to this channel"
-                        return
-                    case 50021:
-                        """Cannot execute on system message"""
-                        reason_text: str = "This thread is archived"
-                        pass
-                    case 160005:
-                        """Thread is locked"""
-                        reason_text: str = "This thread is locked"
-                        pass
-                    case _:
-                        """Default"""
-                        reason_text: str = f"Unknown error {e.code}"
-                        pass
-            sent_msg = await webhook.send(
+                reason_text, must_return = _MIGRATE_ERRORS.get(e.code, (f"Unknown error {e.code}", False))
+                if must_return:
+                    return False, None, sent_msg
+            sent_msg = await send_webhook_message(
+                dest_chan,
                 content=f"Message {orig_msg.jump_url} {orig_msg.id} cannot be migrated because {reason_text}",
                 username=author_name,
-                avatar_url=author_avatar.url,
+                avatar_url=avatar_url,
                 wait=True,
-                thread=thread,
-                thread_name=thread_name
+                thread=send_kwargs["thread"],
+                thread_name=send_kwargs["thread_name"]
             )
+        # Only the first chunk carries the embeds
+        send_kwargs["embeds"] = None
         if sent_msg and isinstance(sent_msg.channel, interactions.ThreadChannel):
             output_thread_id = sent_msg.channel.id
+            # The following chunks go to the thread created by the first one
+            send_kwargs["thread"], send_kwargs["thread_name"] = output_thread_id, None
 
     return True, output_thread_id, sent_msg
 
+async def fetch_archived_thread_ids(client: interactions.Client, channel_id: int) -> list[int]:
+    """
+    Fetch the IDs of all public archived threads in a channel, following the pagination.
+
+    Parameters:
+        client      Client      Bot client
+        channel_id  int         Channel ID
+
+    Return:
+        thread_ids  list[int]   Archived thread IDs from the oldest to the newest
+    """
+    threads: dict[int, dict] = {}
+    before: Optional[int] = None
+    while True:
+        page = await client.http.list_public_archived_threads(channel_id, before=before)
+        count: int = len(threads)
+        for t in page["threads"]:
+            threads[int(t["id"])] = t
+        if not page.get("has_more") or len(threads) == count:
+            break
+        # Pages are in descending archive time, the next one starts before the last thread.
+        # The library takes the cursor as a snowflake, which only keeps milliseconds.
+        # Round up so no thread archived in the same millisecond is skipped, the repeated ones are de-duplicated.
+        last_archived: interactions.Timestamp = interactions.Timestamp.fromisoformat(page["threads"][-1]["thread_metadata"]["archive_timestamp"])
+        before = (last_archived + timedelta(milliseconds=1)).to_snowflake()
+    return list(reversed(threads))
+
 def is_empty_message(msg: interactions.Message) -> bool:
-    return not any((msg.content, msg.embeds, msg.poll, msg.reactions, msg.sticker_items))
+    return not (msg.content or msg.embeds or msg.sticker_items or msg.reactions or msg.poll)
 
-async def migrate_thread(orig_thread: interactions.ThreadChannel, dest_chan: Union[interactions.GuildText, interactions.GuildForum]) -> None:
+async def start_thread_migration(orig_thread: interactions.ThreadChannel, dest_chan: Union[interactions.GuildText, interactions.GuildForum], sticker_cache: Optional[dict[int, list[interactions.Sticker]]] = None) -> tuple[Optional[int], Optional[AsyncIterator[interactions.Message]]]:
     """
-    Migrate a thread to a target channel. It's only limited to thread in GuildText and GuildForumPost types.
+    Start reading the thread history and migrate its parent message to create the destination thread.
+    It's only limited to thread in GuildText and GuildForumPost types.
+
+    Parameters:
+        orig_thread     ThreadChannel   The original thread
+        dest_chan       GuildChannel    Destination channel
+        sticker_cache   Optional[dict]  (Default: None) Destination guild stickers shared by the current migration
+
+    Return:
+        thread_id       Optional[int]   Destination thread ID. 0 if the first message creates it. None if not supported.
+        messages        AsyncIterator   Messages of the original thread from the oldest. None if not supported.
     """
-    if not ((isinstance(orig_thread, interactions.GuildForumPost) and isinstance(dest_chan, interactions.GuildForum)) or \
-        ((isinstance(orig_thread, interactions.GuildPublicThread) and not isinstance(orig_thread, interactions.GuildForumPost)) and isinstance(dest_chan, interactions.GuildText))):
-        return
-    history_iterator: interactions.ChannelHistory = orig_thread.history(0)
-    history_list: list[interactions.Message] = await flatten_history_iterator(history_iterator, reverse=True)
+    is_forum: bool = isinstance(orig_thread, interactions.GuildForumPost)
+    is_public_non_forum: bool = not is_forum and isinstance(orig_thread, interactions.GuildPublicThread)
+    if not ((is_forum and isinstance(dest_chan, interactions.GuildForum)) or \
+        (is_public_non_forum and isinstance(dest_chan, interactions.GuildText))):
+        return None, None
+    history: AsyncIterator[interactions.Message] = iter_history_from_oldest(orig_thread)
+    first_msg: Optional[interactions.Message] = await anext(history, None)
     parent_msg: interactions.Message = None
     thread_id: int = 0
-    if isinstance(orig_thread, interactions.GuildForumPost):
-        orig_thread: interactions.GuildForumPost = cast(interactions.GuildForumPost, orig_thread)
+    if is_forum:
         if orig_thread.initial_post is not None:
             parent_msg = orig_thread.initial_post
-    elif isinstance(orig_thread, interactions.GuildPublicThread) and not isinstance(orig_thread, interactions.GuildForumPost):
-        if orig_thread.parent_message is not None:
-            parent_msg = orig_thread.parent_message
-    else:
-        return
+    elif orig_thread.parent_message is not None:
+        parent_msg = orig_thread.parent_message
     
+    # Migrate the parent message first
+    if first_msg is not None and parent_msg is not None:
+        if is_forum and first_msg != parent_msg:
+            ok, thread_id, _ = await migrate_message(parent_msg, dest_chan, thread_id, sticker_cache)
+        elif is_public_non_forum:
+            ok, _, sent_msg = await migrate_message(parent_msg, dest_chan, sticker_cache=sticker_cache)
+            if sent_msg is None:
+                # Nothing has been sent for the parent message. Create the thread on a placeholder instead.
+                parent_msg = None
+            else:
+                sent_thread = await sent_msg.create_thread(
+                    name = orig_thread.name,
+                    reason = "Message migration"
+                )
+                thread_id = sent_thread.id
     # Create thread
     if parent_msg is None:
-        webhook = await fetch_create_webhook(dest_chan=dest_chan)
-        if isinstance(dest_chan, interactions.GuildForum):
-            sent_msg = await webhook.send(
+        # The guard above pairs a forum post with a GuildForum and a public thread with a GuildText
+        if is_forum:
+            sent_msg = await send_webhook_message(
+                dest_chan,
                 content="This message has been deleted by original author",
                 thread=None,
                 thread_name=orig_thread.name,
                 wait=True
             )
             thread_id = sent_msg.channel.id
-        elif isinstance(dest_chan, interactions.GuildText):
-            sent_msg = await webhook.send(
+        else:
+            sent_msg = await send_webhook_message(
+                dest_chan,
                 content="This message has been deleted by original author",
                 wait=True
             )
@@ -318,48 +519,113 @@ async def migrate_thread(orig_thread: interactions.ThreadChannel, dest_chan: Uni
                 reason="Message migration"
             )
             thread_id = sent_thread.id
-    for i, msg in enumerate(history_list):
-        if i == 0:
-            if isinstance(orig_thread, interactions.GuildForumPost) and parent_msg is not None and msg != parent_msg:
-                ok, thread_id, _ = await migrate_message(parent_msg, dest_chan, thread_id)
-            elif (isinstance(orig_thread, interactions.GuildPublicThread) and not isinstance(orig_thread, interactions.GuildForumPost)) and parent_msg is not None:
-                ok, _, sent_msg = await migrate_message(parent_msg, dest_chan)
-                sent_thread = await sent_msg.create_thread(
-                    name = orig_thread.name,
-                    reason = "Message migration"
-                )
-                thread_id = sent_thread.id
-        if is_empty_message(msg):
-            continue
-        ok, thread_id, _ = await migrate_message(msg, dest_chan, thread_id)
-        if not ok and thread_id is None:
-            break
+    return thread_id, _chain_first(first_msg, history)
+
+async def migrate_thread_messages(messages: AsyncIterator[interactions.Message], dest_chan: Union[interactions.GuildText, interactions.GuildForum], thread_id: int, sticker_cache: Optional[dict[int, list[interactions.Sticker]]] = None) -> None:
+    """
+    Migrate the messages of a thread to the destination thread created by `start_thread_migration`.
+    The history keeps being fetched while the previous messages are being sent.
+
+    Parameters:
+        messages        AsyncIterator   Messages of the original thread from the oldest
+        dest_chan       GuildChannel    Destination channel
+        thread_id       int             Destination thread ID. 0 to create a new one.
+        sticker_cache   Optional[dict]  (Default: None) Destination guild stickers shared by the current migration
+    """
+    queue: asyncio.Queue[Optional[interactions.Message]] = asyncio.Queue(maxsize=history_queue_size)
+    async with _task_group() as tg:
+        producer: asyncio.Task = tg.create_task(_fill_queue(messages, queue))
+        while (msg := await queue.get()) is not None:
+            if is_empty_message(msg):
+                continue
+            ok, thread_id, _ = await migrate_message(msg, dest_chan, thread_id, sticker_cache)
+            if not ok and thread_id is None:
+                producer.cancel()
+                break
+
+async def migrate_thread(orig_thread: interactions.ThreadChannel, dest_chan: Union[interactions.GuildText, interactions.GuildForum], sticker_cache: Optional[dict[int, list[interactions.Sticker]]] = None) -> None:
+    """
+    Migrate a thread to a target channel. It's only limited to thread in GuildText and GuildForumPost types.
+    The destination guild stickers are fetched once per thread unless `sticker_cache` is shared by the caller.
+    """
+    if sticker_cache is None:
+        sticker_cache = {}
+    thread_id, messages = await start_thread_migration(orig_thread, dest_chan, sticker_cache)
+    if thread_id is not None:
+        await migrate_thread_messages(messages, dest_chan, thread_id, sticker_cache)
 
 async def migrate_channel(orig_chan: Union[interactions.GuildText, interactions.GuildForum], dest_chan: Union[interactions.GuildText, interactions.GuildForum], client: interactions.Client) -> None:
     """
     Migrate a channel to another destination channel. It's only limited to GuildText and GuildForum.
     """
+    # Destination guild stickers are fetched once for this migration
+    sticker_cache: dict[int, list[interactions.Sticker]] = {}
     if isinstance(orig_chan, interactions.GuildForum):
         if not isinstance(dest_chan, interactions.GuildForum):
             return
-        orig_chan: interactions.GuildForum = cast(interactions.GuildForum, orig_chan)
-        _archived_posts = await client.http.list_public_archived_threads(orig_chan.id)
-        archived_posts_id: list[int] = [int(_["id"]) for _ in _archived_posts["threads"]]
-        archived_posts_id.reverse()
-        for i in archived_posts_id:
-            post = await orig_chan.fetch_post(id=i)
-            await migrate_thread(post, dest_chan)
-        active_posts: list[interactions.GuildForumPost] = await orig_chan.fetch_posts()
-        active_posts.reverse()
-        for post in active_posts:
-            await migrate_thread(post, dest_chan)
+        fetch_sem: asyncio.Semaphore = asyncio.Semaphore(fetch_concurrency)
+        migrate_sem: asyncio.Semaphore = asyncio.Semaphore(migrate_concurrency)
+
+        async def _fetch_post(post_id: int) -> interactions.GuildForumPost:
+            async with fetch_sem:
+                return await orig_chan.fetch_post(id=post_id)
+
+        async def _migrate_post(post: interactions.GuildForumPost) -> None:
+            async with migrate_sem:
+                await migrate_thread(post, dest_chan, sticker_cache)
+
+        async def _do_archived() -> None:
+            archived_posts_id: list[int] = await fetch_archived_thread_ids(client, orig_chan.id)
+            fetches: list[asyncio.Task] = [tg.create_task(_fetch_post(i)) for i in archived_posts_id]
+            # Start migrating each post as soon as it is fetched
+            for fetch in fetches:
+                tg.create_task(_migrate_post(await fetch))
+
+        async def _do_active(archived_task: asyncio.Task) -> None:
+            active_posts: list[interactions.GuildForumPost] = await orig_chan.fetch_posts()
+            # Queue the active posts behind all archived ones on the migration semaphore
+            await archived_task
+            for post in reversed(active_posts):
+                tg.create_task(_migrate_post(post))
+
+        # Archived and active posts are disjoint and fetched at the same time. Both share the migration semaphore.
+        # A failure cancels the rest of the channel migration.
+        async with _task_group() as tg:
+            archived_task: asyncio.Task = tg.create_task(_do_archived())
+            tg.create_task(_do_active(archived_task))
     elif isinstance(orig_chan, interactions.GuildText):
         if not isinstance(dest_chan, interactions.GuildText):
             return
-        orig_chan: interactions.GuildText = cast(interactions.GuildText, orig_chan)
-        messages: list[interactions.Message] = await flatten_history_iterator(orig_chan.history(0), reverse=True)
-        for msg in messages:
-            if msg.thread:
-                await migrate_thread(msg.thread, dest_chan)
-            else:
-                await migrate_message(msg, dest_chan)
+        # Keep fetching history while the previous messages are being sent
+        queue: asyncio.Queue[Optional[interactions.Message]] = asyncio.Queue(maxsize=history_queue_size)
+
+        # Limits the threads started but not finished, each holding an open history and its first page
+        thread_sem: asyncio.Semaphore = asyncio.Semaphore(migrate_concurrency)
+
+        async def _migrate_thread_messages(messages: AsyncIterator[interactions.Message], thread_id: int) -> None:
+            try:
+                await migrate_thread_messages(messages, dest_chan, thread_id, sticker_cache)
+            finally:
+                thread_sem.release()
+
+        async def _consume() -> None:
+            # Single consumer as the channel messages have to be sent in order.
+            # Once a thread is created, its messages are migrated alongside the following channel messages.
+            while (msg := await queue.get()) is not None:
+                if msg.thread:
+                    await thread_sem.acquire()
+                    try:
+                        thread_id, messages = await start_thread_migration(msg.thread, dest_chan, sticker_cache)
+                    except BaseException:
+                        thread_sem.release()
+                        raise
+                    if thread_id is None:
+                        thread_sem.release()
+                    else:
+                        tg.create_task(_migrate_thread_messages(messages, thread_id))
+                else:
+                    await migrate_message(msg, dest_chan, sticker_cache=sticker_cache)
+
+        async with _task_group() as tg:
+            tg.create_task(_fill_queue(iter_history_from_oldest(orig_chan), queue))
+            tg.create_task(_consume())